@@ -0,0 +1,314 @@
+"""
+Asynchronous variant of the WhatsApp Cloud API wrapper, built on aiohttp
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import aiohttp
+from aiolimiter import AsyncLimiter
+from typing import Optional, Dict, Any, List, Set, Tuple, Union
+
+from .pygwan import (
+    DEFAULT_TIMEOUT,
+    _dumps,
+    _graph_wait,
+    _language,
+    _loads,
+    _text_chunks,
+)
+
+
+class AsyncWhatsApp(object):
+    """
+    Asynchronous WhatsApp Object
+
+    Meant for fan-out workloads (broadcasts, bursts of replies) where requests
+    to the Graph API should be in flight concurrently instead of one at a time.
+    """
+
+    def __init__(
+        self,
+        token=None,
+        phone_number_id=None,
+        max_rate: float = 80,
+        time_period: float = 1,
+        limit_per_host: int = 64,
+        max_retries: int = 3,
+        batch_size: int = 16,
+        linger: float = 0.005,
+    ):
+        """
+        Initialize the AsyncWhatsApp Object
+
+        Args:
+            token[str]: Token for the WhatsApp cloud API obtained from the developer portal
+            phone_number_id[str]: Phone number id for the WhatsApp cloud API obtained from the developer portal
+            max_rate[float]: Maximum number of requests allowed per time_period
+            time_period[float]: Duration in seconds of the rate limiting window
+            limit_per_host[int]: Maximum number of simultaneous connections to the Graph API
+            max_retries[int]: Number of times a request is retried after a 429 response
+            batch_size[int]: Maximum number of queued requests dispatched together
+            linger[float]: Seconds to wait for more requests before dispatching a batch
+        """
+        self.token = token
+        self.phone_number_id = phone_number_id
+        self.base_url = "https://graph.facebook.com/v17.0"
+        self.url = f"{self.base_url}/{phone_number_id}/messages"
+
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer {}".format(self.token),
+        }
+
+        self.limit_per_host = limit_per_host
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.linger = linger
+        self._limiter = AsyncLimiter(max_rate, time_period)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._throttled_until = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session is bound to the running event loop
+        if self._session is None or self._session.closed:
+            connect, read = DEFAULT_TIMEOUT
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self.limit_per_host, keepalive_timeout=75
+                ),
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(connect=connect, sock_read=read),
+            )
+        return self._session
+
+    async def flush(self):
+        """
+        Waits until every queued request has been sent
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """
+        Sends any queued request, then closes the underlying aiohttp session
+        """
+        await self.flush()
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _wait_for_quota(self):
+        delay = self._throttled_until - asyncio.get_running_loop().time()
+        if delay > 0:
+            logging.info("Graph usage limit reached, waiting %.0f seconds", delay)
+            await asyncio.sleep(delay)
+
+    def _record_usage(self, headers):
+        wait = _graph_wait(headers)
+        if wait:
+            self._throttled_until = asyncio.get_running_loop().time() + wait
+
+    async def _post(
+        self, data: Dict[Any, Any], *, action: str, recipient_id: Optional[str]
+    ) -> Dict[Any, Any]:
+        """
+        Queues a payload for the background sender and waits for its response.
+
+        Requests queued within `linger` seconds of each other are dispatched together,
+        which amortizes the per-request overhead under bursty workloads.
+
+        This method is designed to only be used internally.
+
+        Args:
+            data[dict]: Payload to be sent
+            action[str]: What is being sent, used in the log messages
+            recipient_id[str]: Phone number of the user with country code wihout +
+        """
+        logging.info("Sending %s to %s", action, recipient_id)
+        queue = self._queue
+        if queue is None or self._sender is None or self._sender.done():
+            queue = self._queue = asyncio.Queue()
+            self._sender = asyncio.get_running_loop().create_task(
+                self._run_sender(queue)
+            )
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((data, future))
+        status, response = await future
+        if status == 200:
+            logging.info("%s sent to %s", action.capitalize(), recipient_id)
+            return response
+        logging.info("%s not sent to %s", action.capitalize(), recipient_id)
+        logging.info("Status code: %s", status)
+        logging.error("Response: %s", response)
+        return response
+
+    async def _run_sender(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        # bounds the requests in flight across all batches to the connection limit
+        in_flight = asyncio.Semaphore(self.limit_per_host)
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Batches are not awaited here, so a slow request or one backing off
+            # after a 429 does not hold back the requests queued behind it.
+            task = loop.create_task(self._dispatch_batch(queue, batch, in_flight))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _dispatch_batch(
+        self,
+        queue: asyncio.Queue,
+        batch: List[Tuple[Dict[Any, Any], asyncio.Future]],
+        in_flight: asyncio.Semaphore,
+    ):
+        try:
+            await asyncio.gather(
+                *[self._dispatch(data, future, in_flight) for data, future in batch]
+            )
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+    async def _dispatch(
+        self, data: Dict[Any, Any], future: asyncio.Future, in_flight: asyncio.Semaphore
+    ):
+        try:
+            async with in_flight:
+                result = await self._send(data)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    async def _send(self, data: Dict[Any, Any]) -> Tuple[int, Dict[Any, Any]]:
+        """
+        Posts a payload to the messages endpoint, respecting the rate limit and
+        backing off exponentially while Graph answers with 429.
+
+        Returns the status code and the parsed body of the last response.
+        """
+        session = self._get_session()
+        backoff = 1
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_quota()
+            async with self._limiter:
+                async with session.post(self.url, data=_dumps(data)) as r:
+                    self._record_usage(r.headers)
+                    status = r.status
+                    response = _loads(await r.read())
+            if status != 429 or attempt == self.max_retries:
+                break
+            logging.info("Rate limited, retrying in %s seconds", backoff)
+            await asyncio.sleep(backoff)
+            backoff *= 2
+        return status, response
+
+    async def send_message(
+        self, message: str, recipient_id: str, recipient_type="individual", preview_url=True
+    ) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
+        """
+        Sends a text message to a WhatsApp user
+
+        Messages longer than 4096 characters are split into several messages. The parts
+        are sent one after the other so that they are delivered in order.
+
+        Args:
+            message[str]: Message to be sent to the user
+            recipient_id[str]: Phone number of the user with country code wihout +
+            recipient_type[str]: Type of the recipient, either individual or group
+            preview_url[bool]: Whether to send a preview url or not
+
+        Returns:
+            The response from the API, or a list of responses when the message was split
+
+        Example:
+            >>> from pygwan.aio import AsyncWhatsApp
+            >>> async with AsyncWhatsApp(token, phone_number_id) as whatsapp:
+            ...     await whatsapp.send_message("Hello World", "5511999999999")
+        """
+        responses = []
+        for chunk in _text_chunks(message):
+            data = {
+                "messaging_product": "whatsapp",
+                "recipient_type": recipient_type,
+                "to": recipient_id,
+                "type": "text",
+                "text": {"preview_url": preview_url, "body": chunk},
+            }
+            responses.append(
+                await self._post(data, action="message", recipient_id=recipient_id)
+            )
+        if len(responses) == 1:
+            return responses[0]
+        return responses
+
+    async def broadcast_message(
+        self, message: str, recipient_ids: List[str], preview_url=True
+    ) -> List[Union[Dict[Any, Any], List[Dict[Any, Any]]]]:
+        """
+        Sends the same text message to several WhatsApp users concurrently
+
+        Args:
+            message[str]: Message to be sent to the users
+            recipient_ids[list]: Phone numbers of the users with country code wihout +
+            preview_url[bool]: Whether to send a preview url or not
+
+        Returns:
+            List of responses from the API, in the same order as recipient_ids
+
+        Example:
+            >>> from pygwan.aio import AsyncWhatsApp
+            >>> async with AsyncWhatsApp(token, phone_number_id) as whatsapp:
+            ...     await whatsapp.broadcast_message("Hello", ["5511999999999", "5511888888888"])
+        """
+        return await asyncio.gather(
+            *[
+                self.send_message(message, recipient_id, preview_url=preview_url)
+                for recipient_id in recipient_ids
+            ]
+        )
+
+    async def send_template(
+        self, template, recipient_id: str, components, lang: str = "en_US"
+    ) -> Dict[Any, Any]:
+        """
+        Sends a template message to a WhatsApp user
+
+        Args:
+            template[str]: Template name to be sent to the user
+            recipient_id[str]: Phone number of the user with country code wihout +
+            components[list]: List of components to be sent to the user
+            lang[str]: Language of the template message
+        """
+        data = {
+            "messaging_product": "whatsapp",
+            "to": recipient_id,
+            "type": "template",
+            "template": {
+                "name": template,
+                "language": _language(lang),
+                "components": components,
+            },
+        }
+        return await self._post(data, action="template", recipient_id=recipient_id)
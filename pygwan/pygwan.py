@@ -3,31 +3,395 @@ Unofficial python wrapper for the WhatsApp Cloud API by Tarmica Chiwara
 """
 from __future__ import annotations
 import os
+import json
+import functools
+import socket
+import time
+import threading
+import types
 import mimetypes
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 import warnings
-from colorama import Fore, Style
-from requests_toolbelt.multipart.encoder import MultipartEncoder
-from typing import Optional, Dict, Any, List, Union, Tuple, Callable
-
+from typing import (
+    Optional,
+    Dict,
+    Any,
+    List,
+    Union,
+    Tuple,
+    Callable,
+    Iterator,
+    NamedTuple,
+    Mapping,
+)
+
+
+try:
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+
+    def _dumps(obj: Any) -> bytes:  # type: ignore[misc]
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def _loads(obj: Any) -> Any:  # type: ignore[misc]
+        if isinstance(obj, memoryview):
+            obj = obj.tobytes()
+        return json.loads(obj)
+
+try:
+    from mypy_extensions import mypyc_attr
+except ImportError:
+    # Only read by mypyc when building the optional native module
+    def mypyc_attr(*attrs: str, **kwattrs: Any) -> Callable[[Any], Any]:  # type: ignore[misc]
+        return lambda cls: cls
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None  # type: ignore[assignment]
+
+
+# Returned by WhatsApp.preprocess for payloads without a value object, so every
+# miss shares one read-only mapping
+_EMPTY: Mapping[Any, Any] = types.MappingProxyType({})
+# A webhook payload, either decoded or as the raw JSON body
+WebhookData = Union[Dict[Any, Any], str, bytes, bytearray, memoryview]
 
 # Setup logging
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 
+GRAPH_HOST = "https://graph.facebook.com"
+# Sized for concurrent senders (e.g. webhook workers fanning out replies) so
+# connections are not discarded once the default pool of 10 is exhausted.
+POOL_MAXSIZE = max(32, (os.cpu_count() or 1) * 8)
+# urllib3 already sets TCP_NODELAY; keep-alive probes stop idle pooled
+# connections from being silently dropped by middleboxes.
+SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+# Maximum length of a WhatsApp text message body
+MAX_TEXT_LENGTH = 4096
+# Size of the blocks media downloads are written to disk in
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+# (connect, read) timeout applied to every request that does not set its own,
+# so a hung socket can never hold a pooled connection forever.
+DEFAULT_TIMEOUT = (3.05, 10)
+# Longest pause in seconds taken when Graph reports that the usage quota is
+# exhausted, so a long regain estimate cannot stall a sender indefinitely.
+MAX_THROTTLE_WAIT = 60
+
+
+def _graph_usage(headers) -> Tuple[float, float]:
+    """
+    Reads the X-App-Usage and X-Business-Use-Case-Usage headers returned by Graph
+
+    Args:
+        headers[Mapping]: Response headers of a Graph API call
+
+    Returns:
+        Tuple[float, float]: Highest usage percentage reported and the number of seconds
+                             until access is regained (0 when not throttled)
+    """
+    # floats, as the regain estimate is given in (possibly fractional) minutes
+    usage: float = 0.0
+    regain: float = 0.0
+    try:
+        app_usage = headers.get("X-App-Usage")
+        if app_usage:
+            usage = max(json.loads(app_usage).values(), default=0)
+        buc_usage = headers.get("X-Business-Use-Case-Usage")
+        if buc_usage:
+            for entries in json.loads(buc_usage).values():
+                for entry in entries:
+                    usage = max(
+                        usage,
+                        entry.get("call_count", 0),
+                        entry.get("total_cputime", 0),
+                        entry.get("total_time", 0),
+                    )
+                    regain = max(
+                        regain, entry.get("estimated_time_to_regain_access", 0) * 60
+                    )
+    except (ValueError, TypeError, AttributeError):
+        logging.info("Could not parse Graph usage headers")
+    return usage, regain
+
+
+def _graph_wait(headers) -> float:
+    """
+    Returns how many seconds to pause sending for, given the headers of a Graph response
+
+    Shared by the sync and async clients so the same headers give the same backoff.
+    """
+    usage, regain = _graph_usage(headers)
+    if regain:
+        return min(MAX_THROTTLE_WAIT, regain)
+    if usage >= 100:
+        return MAX_THROTTLE_WAIT
+    return 0
+
+
+def _text_chunks(message: str) -> Iterator[str]:
+    """
+    Lazily yields the parts of a text message that fit in a single WhatsApp message
+    """
+    if not message:
+        yield message
+        return
+    for i in range(0, len(message), MAX_TEXT_LENGTH):
+        yield message[i : i + MAX_TEXT_LENGTH]
+
+
+# simdjson parsers are reused for speed but must not be shared between threads
+_parsers = threading.local()
+
+
+RawWebhook = Union[bytes, bytearray, memoryview, str]
+
+
+def _webhook_value_json(raw: RawWebhook) -> Dict[Any, Any]:
+    """
+    Decodes the entry/changes/value object of a raw webhook body with _loads
+    """
+    return _loads(raw)["entry"][0]["changes"][0]["value"]
+
+
+def _webhook_value_simdjson(raw: RawWebhook) -> Dict[Any, Any]:
+    """
+    Decodes only the entry/changes/value object of a raw webhook body with simdjson
+
+    No separate UTF-8 check is made on the body: simdjson validates UTF-8 with SIMD
+    instructions as part of parsing, and the other decoders reject invalid input too.
+    """
+    parser = getattr(_parsers, "parser", None)
+    if parser is None:
+        parser = _parsers.parser = simdjson.Parser()
+    # Only the value object is materialized; no simdjson proxy outlives this call,
+    # which the parser requires before it can be reused.
+    document: Any = parser.parse(raw)
+    return document.at_pointer("/entry/0/changes/0/value").as_dict()
+
+
+# The decoder is picked once at import instead of checking for simdjson per webhook
+_webhook_value: Callable[[RawWebhook], Dict[Any, Any]] = (
+    _webhook_value_json if simdjson is None else _webhook_value_simdjson
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _language(lang: str) -> Dict[str, str]:
+    """
+    Returns the shared, never mutated language object of a template payload
+    """
+    return {"code": lang}
+
+
+@functools.lru_cache(maxsize=256)
+def _template_prefix(template: str, lang: str) -> bytes:
+    """
+    Returns the pre-serialized start of a template payload, up to its components
+
+    The payload is completed with _template_body, so only the components and the
+    recipient have to be serialized on every send.
+    """
+    return b"".join(
+        (
+            b'{"messaging_product":"whatsapp","type":"template","template":{"name":',
+            _dumps(template),
+            b',"language":',
+            _dumps(_language(lang)),
+            b',"components":',
+        )
+    )
+
+
+def _template_body(prefix: bytes, components, recipient_id: str) -> bytes:
+    return b"".join(
+        (prefix, _dumps(components), b'},"to":', _dumps(recipient_id), b"}")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _templatev2_deprecation() -> str:
+    """
+    Builds the colored send_templatev2 deprecation message on first use
+    """
+    # imported here so that importing pygwan does not pay for colorama
+    from colorama import Fore, Style
+
+    return (
+        f"{Fore.RED}The 'send_templatev2' method is being deprecated and will be removed in the future. "
+        f"Please use the 'send_template' method instead.{Style.RESET_ALL}"
+    )
+
 
+# The extractors run whenever a view is built, so a missing field yields None
+# instead of breaking every getter on the payload.
+def _text_body(message: Dict[Any, Any]) -> Optional[str]:
+    return message.get("text", {}).get("body")
+
+
+def _interactive_title(message: Dict[Any, Any]) -> Optional[str]:
+    interactive = message.get("interactive", {})
+    reply = interactive.get("button_reply") or interactive.get("list_reply")
+    return reply.get("title") if reply else None
+
+
+def _button_text(message: Dict[Any, Any]) -> Optional[str]:
+    return message.get("button", {}).get("text")
+
+
+def _no_text(message: Dict[Any, Any]) -> None:
+    return None
+
+
+# Text extractor for each message type, looked up once instead of an if/elif chain
+_MSG_EXTRACTORS: Dict[str, Callable[[Dict[Any, Any]], Optional[str]]] = {
+    "text": _text_body,
+    "interactive": _interactive_title,
+    "button": _button_text,
+}
+
+
+class WebhookMessage(NamedTuple):
+    """
+    Flat view of the fields read from a webhook payload
+
+    Built once per payload so each getter is a single attribute access instead of
+    a chain of dict lookups. Fields missing from the payload are None.
+    """
+
+    wa_id: Optional[str]
+    name: Optional[str]
+    message_id: Optional[str]
+    type: Optional[str]
+    text: Optional[str]
+    interactive: Optional[Dict[Any, Any]]
+    image: Optional[Dict[Any, Any]]
+    timestamp: Optional[str]
+    status: Optional[str]
+
+    @classmethod
+    def from_value(cls, value: Mapping[Any, Any]) -> WebhookMessage:
+        """
+        Builds the view from the value returned by WhatsApp.preprocess
+        """
+        contacts = value.get("contacts")
+        messages = value.get("messages")
+        statuses = value.get("statuses")
+        contact: Dict[str, Any] = contacts[0] if contacts else {}
+        message: Dict[str, Any] = messages[0] if messages else {}
+        status: Dict[str, Any] = statuses[0] if statuses else {}
+        message_type = message.get("type")
+        return cls(
+            wa_id=contact.get("wa_id"),
+            name=contact.get("profile", {}).get("name"),
+            message_id=message.get("id"),
+            type=message_type,
+            text=_MSG_EXTRACTORS.get(message_type or "", _no_text)(message),
+            interactive=message.get("interactive"),
+            image=message.get("image"),
+            timestamp=message.get("timestamp"),
+            status=status.get("status"),
+        )
+
+
+class _GraphRetry(Retry):
+    """
+    Retry policy that only retries a POST when Graph rejected it with 429
+
+    Any other error status, or a read error such as a timeout while waiting for the
+    response, may come after the message was already accepted, and retrying it would
+    deliver the message twice.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method == "POST" and status_code != 429:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def increment(
+        self,
+        method=None,
+        url=None,
+        response=None,
+        error=None,
+        _pool=None,
+        _stacktrace=None,
+    ):
+        if method == "POST" and error is not None and self._is_read_error(error):
+            raise error.with_traceback(_stacktrace)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+# Subclassed at runtime by _caching_adapter, also when compiled with mypyc
+@mypyc_attr(allow_interpreted_subclasses=True)
+class _KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with TCP keep-alive / TCP_NODELAY sockets and a default timeout
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        return super().send(request, stream, timeout, verify, cert, proxies)
+
+
+def _caching_adapter(cache_dir: str, **kwargs) -> HTTPAdapter:
+    """
+    Builds a keep-alive adapter that also caches GET responses on disk
+
+    Requires the optional cachecontrol package.
+    """
+    from cachecontrol import CacheControlAdapter
+    from cachecontrol.caches.file_cache import FileCache
+
+    # built with type() because mypyc does not compile nested class definitions
+    caching_adapter = type(
+        "_CachingAdapter",
+        (CacheControlAdapter, _KeepAliveAdapter),
+        {"__module__": __name__},
+    )
+    return caching_adapter(cache=FileCache(cache_dir), **kwargs)
+
+
+# Subclassing WhatsApp must keep working when the module is compiled with mypyc
+@mypyc_attr(allow_interpreted_subclasses=True)
 class WhatsApp(object):
     """ "
     WhatsApp Object
     """
 
-    def __init__(self, token=None, phone_number_id=None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        phone_number_id: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        use_http2: bool = False,
+    ) -> None:
         """
         Initialize the WhatsApp Object
 
         Args:
             token[str]: Token for the WhatsApp cloud API obtained from the developer portal
             phone_number_id[str]: Phone number id for the WhatsApp cloud API obtained from the developer portal
+            cache_dir[str]: Directory in which downloaded media is cached, honouring the
+                            Cache-Control and ETag headers of the response. Requires the
+                            cachecontrol package. Caching is disabled by default.
+            use_http2[bool]: Whether to send messages over a single multiplexed HTTP/2
+                             connection. Requires the httpx package with its http2 extra.
+                             Network errors while sending messages are then raised as
+                             httpx exceptions instead of requests ones.
         """
         self.token = token
         self.phone_number_id = phone_number_id
@@ -40,6 +404,130 @@ class WhatsApp(object):
             "Authorization": "Bearer {}".format(self.token),
         }
 
+        # A single session keeps the connection to the Graph API alive across
+        # calls instead of paying a fresh TCP + TLS handshake for every request.
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.headers["Connection"] = "keep-alive"
+        retries = _GraphRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST"]),
+            respect_retry_after_header=True,
+            # hand the last response back once retries run out, so the senders can
+            # log it and return Graph's error instead of raising RetryError
+            raise_on_status=False,
+        )
+        if cache_dir:
+            adapter = _caching_adapter(
+                cache_dir, pool_connections=1, max_retries=retries
+            )
+        else:
+            adapter = _KeepAliveAdapter(pool_connections=1, max_retries=retries)
+        self._session.mount("https://", adapter)
+        self._session.mount(
+            GRAPH_HOST,
+            _KeepAliveAdapter(
+                pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=retries
+            ),
+        )
+
+        # Last raw webhook body handed to preprocess and its result
+        self._preprocessed: Tuple[Any, Any] = (None, None)
+        self._viewed: Tuple[Any, Any] = (None, None)
+
+        # Monotonic time before which no message is sent, set when Graph reports
+        # that the usage quota is nearly exhausted
+        self._throttled_until = 0.0
+
+        # Messages may instead ride one HTTP/2 connection, where concurrent sends
+        # are multiplexed and HPACK shrinks the repeated Authorization header.
+        self._http = None
+        if use_http2:
+            import httpx
+
+            connect, read = DEFAULT_TIMEOUT
+            self._http = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+                timeout=httpx.Timeout(read, connect=connect),
+            )
+
+    def close(self):
+        """
+        Closes the underlying HTTP session and releases its pooled connections
+        """
+        self._session.close()
+        if self._http is not None:
+            self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _post_body(self, url: str, body: bytes):
+        """
+        Posts an already serialized JSON body over HTTP/2 when enabled, else HTTP/1.1
+        """
+        delay = self._throttled_until - time.monotonic()
+        if delay > 0:
+            logging.info("Graph usage limit reached, waiting %.0f seconds", delay)
+            time.sleep(delay)
+        r: Any
+        if self._http is not None:
+            r = self._http.post(url, content=body)
+            # httpx has no retry policy of its own, so 429s are retried here with
+            # the same limit and backoff as the session's _GraphRetry
+            for attempt in range(5):
+                if r.status_code != 429:
+                    break
+                try:
+                    backoff = float(r.headers["Retry-After"])
+                except (KeyError, ValueError):
+                    backoff = 0.5 * 2**attempt
+                logging.info("Rate limited, retrying in %s seconds", backoff)
+                time.sleep(backoff)
+                r = self._http.post(url, content=body)
+        else:
+            r = self._session.post(url, data=body)
+        wait = _graph_wait(r.headers)
+        if wait:
+            self._throttled_until = time.monotonic() + wait
+        return r
+
+    def _post(
+        self,
+        data: Union[Dict[Any, Any], bytes],
+        *,
+        action: str,
+        recipient_id: Optional[str],
+    ) -> Dict[Any, Any]:
+        """
+        Posts a payload to the messages endpoint and returns the parsed response
+
+        This method is designed to only be used internally.
+
+        Args:
+            data[dict|bytes]: Payload to be sent, or its already serialized JSON
+            action[str]: What is being sent, used in the log messages
+            recipient_id[str]: Phone number of the user with country code wihout +
+        """
+        logging.info("Sending %s to %s", action, recipient_id)
+        body = data if isinstance(data, bytes) else _dumps(data)
+        r = self._post_body(self.url, body)
+        response = _loads(r.content)
+        if r.status_code == 200:
+            logging.info("%s sent to %s", action.capitalize(), recipient_id)
+            return response
+        logging.info("%s not sent to %s", action.capitalize(), recipient_id)
+        logging.info("Status code: %s", r.status_code)
+        logging.error("Response: %s", response)
+        return response
+
     def send_message(
         self, message: str, recipient_id: str, recipient_type="individual", preview_url=True
     ):
@@ -67,15 +555,7 @@ class WhatsApp(object):
             "type": "text",
             "text": {"preview_url": preview_url, "body": message},
         }
-        logging.info(f"Sending message to {recipient_id}")
-        r = requests.post(f"{self.url}", headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Message sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Message not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="message", recipient_id=recipient_id)
 
     def reply_to_message(
         self, message_id: str, recipient_id: str, message: str, preview_url: bool = True
@@ -97,16 +577,7 @@ class WhatsApp(object):
             "context": {"message_id": message_id},
             "text": {"preview_url": preview_url, "body": message},
         }
-
-        logging.info(f"Replying to {message_id}")
-        r = requests.post(f"{self.url}", headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Message sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Message not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="reply", recipient_id=recipient_id)
 
     def send_template(self, template, recipient_id: str, components, lang: str = "en_US"):
         """
@@ -127,30 +598,39 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.send_template("hello_world", "5511999999999", lang="en_US"))
         """
-        data = {
-            "messaging_product": "whatsapp",
-            "to": recipient_id,
-            "type": "template",
-            "template": {
-                "name": template,
-                "language": {"code": lang},
-                "components": components,
-            },
-        }
-        logging.info(f"Sending template to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Template sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Template not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        body = _template_body(_template_prefix(template, lang), components, recipient_id)
+        return self._post(body, action="template", recipient_id=recipient_id)
+
+    def make_sender(
+        self, template: str, lang: str = "en_US"
+    ) -> Callable[[str, Any], Dict[Any, Any]]:
+        """
+        Returns a function that sends the given template, for bots that send the same
+        template over and over. Everything that does not depend on the recipient or the
+        components is resolved once, when the sender is made.
+
+        Args:
+            template[str]: Template name to be sent
+            lang[str]: Language of the template message
+
+        Example:
+            >>> from whatsapp import WhatsApp
+            >>> whatsapp = WhatsApp(token, phone_number_id)
+            >>> send_welcome = whatsapp.make_sender("welcome")
+            >>> send_welcome("5511999999999", components)
+        """
+        prefix = _template_prefix(template, lang)
+        post = self._post
+
+        def send(recipient_id: str, components) -> Dict[Any, Any]:
+            body = _template_body(prefix, components, recipient_id)
+            return post(body, action="template", recipient_id=recipient_id)
+
+        return send
 
     def send_templatev2(self, template, recipient_id, components, lang: str = "en_US"):
-        message = f"{Fore.RED}The 'send_templatev2' method is being deprecated and will be removed in the future. Please use the 'send_template' method instead.{Style.RESET_ALL}"
-        warnings.warn(message, DeprecationWarning)
-        return send_template(template, recipient_id, components, lang=lang)  # type: ignore
+        warnings.warn(_templatev2_deprecation(), DeprecationWarning, stacklevel=2)
+        return self.send_template(template, recipient_id, components, lang=lang)
 
     def send_location(self, lat, long, name, address, recipient_id):
         """
@@ -179,15 +659,7 @@ class WhatsApp(object):
                 "address": address,
             },
         }
-        logging.info(f"Sending location to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Location sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Location not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(r.json())
-        return r.json()
+        return self._post(data, action="location", recipient_id=recipient_id)
 
     def send_image(
         self,
@@ -232,15 +704,7 @@ class WhatsApp(object):
                 "type": "image",
                 "image": {"id": image, "caption": caption},
             }
-        logging.info(f"Sending image to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Image sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Image not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(r.json())
-        return r.json()
+        return self._post(data, action="image", recipient_id=recipient_id)
 
     def send_sticker(
         self, sticker: str, recipient_id: str, recipient_type="individual", link=True
@@ -279,15 +743,7 @@ class WhatsApp(object):
                 "type": "sticker",
                 "sticker": {"id": sticker},
             }
-        logging.info(f"Sending sticker to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Sticker sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Sticker not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(r.json())
-        return r.json()
+        return self._post(data, action="sticker", recipient_id=recipient_id)
 
     def send_audio(self, audio, recipient_id, link=True):
         """
@@ -318,15 +774,7 @@ class WhatsApp(object):
                 "type": "audio",
                 "audio": {"id": audio},
             }
-        logging.info(f"Sending audio to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Audio sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Audio not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="audio", recipient_id=recipient_id)
 
     def send_video(
         self, video, recipient_id, caption=None, link=True
@@ -360,15 +808,7 @@ class WhatsApp(object):
                 "type": "video",
                 "video": {"id": video, "caption": caption},
             }
-        logging.info(f"Sending video to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Video sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Video not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="video", recipient_id=recipient_id)
 
     def send_custom_json(self, data, recipient_id=None):
         """
@@ -390,20 +830,14 @@ class WhatsApp(object):
             if "to" in data.keys():
                 data_recipient_id = data["to"]
                 logging.info(
-                    f"Recipient Id is defined in data ({data_recipient_id}) and recipient_id parameter ({recipient_id})"
+                    "Recipient Id is defined in data (%s) and recipient_id parameter (%s)",
+                    data_recipient_id,
+                    recipient_id,
                 )
             else:
                 data["to"] = recipient_id
 
-        logging.info(f"Sending custom json to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Custom json sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Custom json not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="custom json", recipient_id=recipient_id)
 
     def send_document(
         self, document, recipient_id, caption=None, link=True
@@ -438,15 +872,7 @@ class WhatsApp(object):
                 "document": {"id": document, "caption": caption},
             }
 
-        logging.info(f"Sending document to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Document sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Document not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="document", recipient_id=recipient_id)
 
     def send_contacts(
         self, contacts: List[Dict[Any, Any]], recipient_id: str
@@ -485,15 +911,7 @@ class WhatsApp(object):
             "type": "contacts",
             "contacts": contacts,
         }
-        logging.info(f"Sending contacts to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Contacts sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Contacts not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.error(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="contacts", recipient_id=recipient_id)
 
     def upload_media(self, media: str) -> Union[Dict[Any, Any], None]:
         """
@@ -509,6 +927,8 @@ class WhatsApp(object):
 
         REFERENCE: https://developers.facebook.com/docs/whatsapp/cloud-api/reference/media#
         """
+        from requests_toolbelt.multipart.encoder import MultipartEncoder
+
         form_data = {
             "file": (
                 media,
@@ -519,21 +939,20 @@ class WhatsApp(object):
             "type": mimetypes.guess_type(media)[0],
         }
         form_data = MultipartEncoder(fields=form_data)
-        headers = self.headers.copy()
-        headers["Content-Type"] = form_data.content_type
-        logging.info(f"Content-Type: {form_data.content_type}")
-        logging.info(f"Uploading media {media}")
-        r = requests.post(
+        headers = {"Content-Type": form_data.content_type}
+        logging.info("Content-Type: %s", form_data.content_type)
+        logging.info("Uploading media %s", media)
+        r = self._session.post(
             f"{self.base_url}/{self.phone_number_id}/media",
             headers=headers,
             data=form_data,
         )
         if r.status_code == 200:
-            logging.info(f"Media {media} uploaded")
-            return r.json()
-        logging.info(f"Error uploading media {media}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.info(f"Response: {r.json()}")
+            logging.info("Media %s uploaded", media)
+            return _loads(r.content)
+        logging.info("Error uploading media %s", media)
+        logging.info("Status code: %s", r.status_code)
+        logging.info("Response: %s", _loads(r.content))
         return None
 
     def delete_media(self, media_id: str) -> Union[Dict[Any, Any], None]:
@@ -543,14 +962,14 @@ class WhatsApp(object):
         Args:
             media_id[str]: Id of the media to be deleted
         """
-        logging.info(f"Deleting media {media_id}")
-        r = requests.delete(f"{self.base_url}/{media_id}", headers=self.headers)
+        logging.info("Deleting media %s", media_id)
+        r = self._session.delete(f"{self.base_url}/{media_id}")
         if r.status_code == 200:
-            logging.info(f"Media {media_id} deleted")
-            return r.json()
-        logging.info(f"Error deleting media {media_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.info(f"Response: {r.json()}")
+            logging.info("Media %s deleted", media_id)
+            return _loads(r.content)
+        logging.info("Error deleting media %s", media_id)
+        logging.info("Status code: %s", r.status_code)
+        logging.info("Response: %s", _loads(r.content))
         return None
 
     def mark_as_read(self, message_id: str) -> Dict[Any, Any]:
@@ -568,28 +987,20 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.mark_as_read("message_id")
         """
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
-
         json_data = {
             "messaging_product": "whatsapp",
             "status": "read",
             "message_id": message_id,
         }
-        logging.info(f"Marking message {message_id} as read")
-        response = requests.post(
-            f"{self.v17_base_url}/{self.phone_number_id}/messages",
-            headers=headers,
-            json=json_data,
-        ).json()
-        if response.status_code == 200:
-            logging.info(f"Message {message_id} marked as read")
+        logging.info("Marking message %s as read", message_id)
+        r = self._post_body(self.url, _dumps(json_data))
+        response = _loads(r.content)
+        if r.status_code == 200:
+            logging.info("Message %s marked as read", message_id)
             return response
-        logging.info(f"Error marking message {message_id} as read")
-        logging.info(f"Status code: {response.status_code}")
-        logging.info(f"Response: {response.json()}")
+        logging.info("Error marking message %s as read", message_id)
+        logging.info("Status code: %s", r.status_code)
+        logging.info("Response: %s", response)
         return response
 
     def mark_as_read_by_winter(self, message_id: str):
@@ -607,22 +1018,13 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.mark_as_read("message_id")
         """
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
-
         json_data = {
             "messaging_product": "whatsapp",
             "status": "read",
             "message_id": message_id,
         }
-        logging.info(f"Marking message {message_id} as read")
-        requests.post(
-            f"{self.v17_base_url}/{self.phone_number_id}/messages",
-            headers=headers,
-            json=json_data,
-        ).json()
+        logging.info("Marking message %s as read", message_id)
+        self._post_body(self.url, _dumps(json_data))
 
     def create_button(self, button: Dict[Any, Any]) -> Dict[Any, Any]:
         """
@@ -658,15 +1060,7 @@ class WhatsApp(object):
             "type": "interactive",
             "interactive": self.create_button(button),
         }
-        logging.info(f"Sending buttons to {recipient_id}")
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Buttons sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Buttons not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.info(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="buttons", recipient_id=recipient_id)
 
     def send_reply_button(
         self, button: Dict[Any, Any], recipient_id: str
@@ -688,14 +1082,7 @@ class WhatsApp(object):
             "type": "interactive",
             "interactive": button,
         }
-        r = requests.post(self.url, headers=self.headers, json=data)
-        if r.status_code == 200:
-            logging.info(f"Reply buttons sent to {recipient_id}")
-            return r.json()
-        logging.info(f"Reply buttons not sent to {recipient_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.info(f"Response: {r.json()}")
-        return r.json()
+        return self._post(data, action="reply buttons", recipient_id=recipient_id)
 
     def query_media_url(self, media_id: str) -> Union[str, None]:
         """
@@ -713,14 +1100,14 @@ class WhatsApp(object):
             >>> whatsapp.query_media_url("media_id")
         """
 
-        logging.info(f"Querying media url for {media_id}")
-        r = requests.get(f"{self.base_url}/{media_id}", headers=self.headers)
+        logging.info("Querying media url for %s", media_id)
+        r = self._session.get(f"{self.base_url}/{media_id}")
         if r.status_code == 200:
-            logging.info(f"Media url queried for {media_id}")
-            return r.json()["url"]
-        logging.info(f"Media url not queried for {media_id}")
-        logging.info(f"Status code: {r.status_code}")
-        logging.info(f"Response: {r.json()}")
+            logging.info("Media url queried for %s", media_id)
+            return _loads(r.content)["url"]
+        logging.info("Media url not queried for %s", media_id)
+        logging.info("Status code: %s", r.status_code)
+        logging.info("Response: %s", _loads(r.content))
         return None
 
     def download_media(
@@ -744,35 +1131,85 @@ class WhatsApp(object):
             >>> whatsapp.download_media("media_url", "image/jpeg")
             >>> whatsapp.download_media("media_url", "video/mp4", "path/to/file") #do not include the file extension
         """
-        r = requests.get(media_url, headers=self.headers)
-        content = r.content
         extension = mime_type.split("/")[1]
-        # create a temporary file
+        save_file_here = f"{file_path}.{extension}" if file_path else f"temp.{extension}"
+        # the body is written next to the target and only moved into place once
+        # complete, so a failed download never leaves a truncated file behind
+        partial_file = f"{save_file_here}.part"
         try:
-            save_file_here = (
-                f"{file_path}.{extension}" if file_path else f"temp.{extension}"
-            )
-            with open(save_file_here, "wb") as f:
-                f.write(content)
-            logging.info(f"Media downloaded to {save_file_here}")
-            return f.name
+            # stream the body to disk so large media is never held in memory at once
+            with self._session.get(
+                media_url, stream=True, timeout=(DEFAULT_TIMEOUT[0], 30)
+            ) as r:
+                r.raise_for_status()
+                with open(partial_file, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            os.replace(partial_file, save_file_here)
+            logging.info("Media downloaded to %s", save_file_here)
+            return save_file_here
         except Exception as e:
             logging.info(e)
-            logging.ERROR(f"Error downloading media to {save_file_here}")
+            logging.error("Error downloading media to %s", save_file_here)
+            try:
+                os.remove(partial_file)
+            except OSError:
+                pass
             return None
 
-    def preprocess(self, data: Dict[Any, Any]) -> Dict[Any, Any]:
+    def preprocess(self, data: WebhookData) -> Mapping[Any, Any]:
         """
         Preprocesses the data received from the webhook.
 
         This method is designed to only be used internally.
 
         Args:
-            data[dict]: The data received from the webhook
+            data[dict]: The data received from the webhook, either decoded or as the raw
+                        JSON body. Raw bodies can be passed as bytes (as handed out by
+                        Starlette / FastAPI) without decoding them first. With
+                        pysimdjson installed only the value object of a raw body is
+                        turned into Python objects, otherwise the body is decoded with
+                        orjson when it is installed.
+
+        Returns:
+            The value object of the webhook, or a shared empty mapping when the payload
+            does not have the expected entry/changes/value structure.
+        """
+        # The getters are typically called several times on the same webhook, so
+        # the last raw body and its value are kept and reused on an identity match.
+        # Only immutable bodies are cached: a dict or a buffer may be changed in place.
+        last_data, value = self._preprocessed
+        if data is last_data:
+            return value
+        try:
+            if isinstance(data, (bytes, bytearray, memoryview, str)):
+                value = _webhook_value(data)
+            else:
+                value = data["entry"][0]["changes"][0]["value"]
+            if not isinstance(value, dict):
+                value = _EMPTY
+        except (KeyError, IndexError, TypeError, AttributeError):
+            value = _EMPTY
+        if isinstance(data, (bytes, str)):
+            self._preprocessed = (data, value)
+        return value
+
+    def _view(self, data: WebhookData) -> WebhookMessage:
+        """
+        Returns the WebhookMessage view of a webhook payload, reusing the last one built
+        when the getters are called again with the same raw body.
+
+        This method is designed to only be used internally.
         """
-        return data["entry"][0]["changes"][0]["value"]
+        last_data, view = self._viewed
+        if data is last_data:
+            return view
+        view = WebhookMessage.from_value(self.preprocess(data))
+        if isinstance(data, (bytes, str)):
+            self._viewed = (data, view)
+        return view
 
-    def is_message(self, data: Dict[Any, Any]) -> bool:
+    def is_message(self, data: WebhookData) -> bool:
         """is_message checks if the data received from the webhook is a message.
 
         Args:
@@ -781,13 +1218,13 @@ class WhatsApp(object):
         Returns:
             bool: True if the data is a message, False otherwise
         """
-        data = self.preprocess(data)
-        if "messages" in data:
+        value = self.preprocess(data)
+        if "messages" in value:
             return True
         else:
             return False
 
-    def get_mobile(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_mobile(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the mobile number of the sender from the data received from the webhook.
 
@@ -801,11 +1238,9 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> mobile = whatsapp.get_mobile(data)
         """
-        data = self.preprocess(data)
-        if "contacts" in data:
-            return data["contacts"][0]["wa_id"]
+        return self._view(data).wa_id
 
-    def get_name(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_name(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the name of the sender from the data received from the webhook.
 
@@ -818,14 +1253,15 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> mobile = whatsapp.get_name(data)
         """
-        contact = self.preprocess(data)
-        if contact:
-            return contact["contacts"][0]["profile"]["name"]
+        return self._view(data).name
 
-    def get_message(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_message(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the text message of the sender from the data received from the webhook.
 
+        For interactive and quick reply button messages this is the title of the option
+        the sender picked.
+
         Args:
             data[dict]: The data received from the webhook
         Returns:
@@ -835,11 +1271,9 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> message = message.get_message(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            return data["messages"][0]["text"]["body"]
+        return self._view(data).text
 
-    def get_message_id(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_message_id(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the message id of the sender from the data received from the webhook.
 
@@ -852,12 +1286,9 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> message_id = whatsapp.get_message_id(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            return data["messages"][0]["id"]
-        return None
+        return self._view(data).message_id
 
-    def get_conversation_id(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_conversation_id(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the conversation id from the data received from the webhook.
 
@@ -870,12 +1301,9 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> conversation_id = whatsapp.get_conversation_id(data)
         """
-        data = self.preprocess(data)
-        if "conversation_id" in data:
-            return data.get("conversation_id")
-        return None
+        return self.preprocess(data).get("conversation_id")
 
-    def get_message_timestamp(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_message_timestamp(self, data: WebhookData) -> Union[str, None]:
         """ "
         Extracts the timestamp of the message from the data received from the webhook.
 
@@ -888,11 +1316,9 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.get_message_timestamp(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            return data["messages"][0]["timestamp"]
+        return self._view(data).timestamp
 
-    def get_interactive_response(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_interactive_response(self, data: WebhookData) -> Union[Dict, None]:
         """
          Extracts the response of the interactive message from the data received from the webhook.
 
@@ -909,12 +1335,9 @@ class WhatsApp(object):
             >>> message_id = response[interactive_type]["id"]
             >>> message_text = response[interactive_type]["title"]
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            if "interactive" in data["messages"][0]:
-                return data["messages"][0]["interactive"]
+        return self._view(data).interactive
 
-    def get_location(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_location(self, data: WebhookData) -> Union[Dict, None]:
         """
         Extracts the location of the sender from the data received from the webhook.
 
@@ -929,12 +1352,10 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.get_location(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            if "location" in data["messages"][0]:
-                return data["messages"][0]["location"]
+        messages = self.preprocess(data).get("messages")
+        return messages[0].get("location") if messages else None
 
-    def get_image(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_image(self, data: WebhookData) -> Union[Dict, None]:
         """ "
         Extracts the image of the sender from the data received from the webhook.
 
@@ -948,21 +1369,21 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> image_id = whatsapp.get_image(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            if "image" in data["messages"][0]:
-                return data["messages"][0]["image"]
+        return self._view(data).image
             
-    def extract_caption(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def extract_caption(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the caption from a nested data structure typical of a WhatsApp business account message.
 
-        :param data: The nested dictionary and list structure containing the message data.
+        :param data: The nested dictionary and list structure containing the message data, or its raw JSON body.
         :return: The extracted caption or None if no caption is found.
         """
+        payload: Dict[Any, Any] = (
+            _loads(data) if isinstance(data, (bytes, bytearray, memoryview, str)) else data
+        )
         # Navigate through the structure to the 'entry' list
-        if 'entry' in data and isinstance(data['entry'], list):
-            for entry in data['entry']:
+        if 'entry' in payload and isinstance(payload['entry'], list):
+            for entry in payload['entry']:
                 # Navigate through the 'changes' list
                 if 'changes' in entry and isinstance(entry['changes'], list):
                     for change in entry['changes']:
@@ -974,7 +1395,7 @@ class WhatsApp(object):
                                     return message['image']['caption']
         return None
 
-    def get_document(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_document(self, data: WebhookData) -> Union[Dict, None]:
         """ "
         Extracts the document of the sender from the data received from the webhook.
 
@@ -988,12 +1409,10 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> document_id = whatsapp.get_document(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            if "document" in data["messages"][0]:
-                return data["messages"][0]["document"]
+        messages = self.preprocess(data).get("messages")
+        return messages[0].get("document") if messages else None
 
-    def get_audio(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_audio(self, data: WebhookData) -> Union[Dict, None]:
         """
         Extracts the audio of the sender from the data received from the webhook.
 
@@ -1008,12 +1427,10 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.get_audio(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            if "audio" in data["messages"][0]:
-                return data["messages"][0]["audio"]
+        messages = self.preprocess(data).get("messages")
+        return messages[0].get("audio") if messages else None
 
-    def get_video(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_video(self, data: WebhookData) -> Union[Dict, None]:
         """
         Extracts the video of the sender from the data received from the webhook.
 
@@ -1028,12 +1445,10 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.get_video(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            if "video" in data["messages"][0]:
-                return data["messages"][0]["video"]
+        messages = self.preprocess(data).get("messages")
+        return messages[0].get("video") if messages else None
 
-    def get_message_type(self, data: Dict[Any, Any]) -> Union[str, None]:
+    def get_message_type(self, data: WebhookData) -> Union[str, None]:
         """
         Gets the type of the message sent by the sender from the data received from the webhook.
 
@@ -1049,29 +1464,64 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.get_message_type(data)
         """
-        data = self.preprocess(data)
-        if "messages" in data:
-            return data["messages"][0]["type"]
+        return self._view(data).type
 
-    def get_delivery(self, data: Dict[Any, Any]) -> Union[Dict, None]:
+    def get_delivery(self, data: WebhookData) -> Union[str, None]:
         """
         Extracts the delivery status of the message from the data received from the webhook.
         Args:
             data [dict]: The data received from the webhook
 
         Returns:
-            dict: The delivery status of the message and message id of the message
+            str: The delivery status of the message
+        """
+        return self._view(data).status
+
+    def batch_extract(self, datas: List[WebhookData]) -> Dict[str, Any]:
         """
-        data = self.preprocess(data)
-        if "statuses" in data:
-            return data["statuses"][0]["status"]
+        Extracts the main fields of many webhook payloads into columnar numpy arrays,
+        for pipelines that store or analyse webhooks in bulk. Requires numpy.
 
-    def changed_field(self, data: Dict[Any, Any]) -> str:
+        Args:
+            datas[list]: The data received from the webhooks
+
+        Returns:
+            dict: Arrays of the same length as datas, keyed by wa_id, message_id, type
+                  and timestamp. Missing values are None, or 0 for timestamp.
+
+        Example:
+            >>> from whatsapp import WhatsApp
+            >>> whatsapp = WhatsApp(token, phone_number_id)
+            >>> columns = whatsapp.batch_extract(datas)
+            >>> columns["timestamp"].max()
+        """
+        import numpy as np
+
+        n = len(datas)
+        wa_ids = np.empty(n, dtype=object)
+        message_ids = np.empty(n, dtype=object)
+        message_types = np.empty(n, dtype=object)
+        timestamps = np.zeros(n, dtype=np.int64)
+        for i, data in enumerate(datas):
+            view = WebhookMessage.from_value(self.preprocess(data))
+            wa_ids[i] = view.wa_id
+            message_ids[i] = view.message_id
+            message_types[i] = view.type
+            if view.timestamp is not None:
+                timestamps[i] = int(view.timestamp)
+        return {
+            "wa_id": wa_ids,
+            "message_id": message_ids,
+            "type": message_types,
+            "timestamp": timestamps,
+        }
+
+    def changed_field(self, data: WebhookData) -> str:
         """
         Helper function to check if the field changed in the data received from the webhook.
 
         Args:
-            data [dict]: The data received from the webhook
+            data [dict]: The data received from the webhook, either decoded or as the raw JSON body
 
         Returns:
             str: The field changed in the data received from the webhook
@@ -1081,4 +1531,7 @@ class WhatsApp(object):
             >>> whatsapp = WhatsApp(token, phone_number_id)
             >>> whatsapp.changed_field(data)
         """
-        return data["entry"][0]["changes"][0]["field"]
+        payload: Dict[Any, Any] = (
+            _loads(data) if isinstance(data, (bytes, bytearray, memoryview, str)) else data
+        )
+        return payload["entry"][0]["changes"][0]["field"]
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("aiolimiter")
+
+from pygwan import aio
+from pygwan.aio import AsyncWhatsApp
+from pygwan.pygwan import MAX_TEXT_LENGTH
+
+
+class FakeResponse:
+    def __init__(self, status, body, delay):
+        self.status = status
+        self.headers = {}
+        self._body = body
+        self._delay = delay
+
+    async def __aenter__(self):
+        await asyncio.sleep(self._delay)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        return json.dumps(self._body).encode()
+
+
+class FakeSession:
+    """
+    Stands in for aiohttp.ClientSession; reply(payload) returns (status, body, delay)
+    """
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.sent = []
+        self.closed = False
+
+    def post(self, url, data):
+        payload = json.loads(data)
+        self.sent.append(payload)
+        return FakeResponse(*self.reply(payload))
+
+    async def close(self):
+        self.closed = True
+
+
+class Sessions(list):
+    @staticmethod
+    def reply(payload):
+        return 200, {"to": payload["to"]}, 0
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """
+    Replaces the aiohttp session of every AsyncWhatsApp, collecting the ones created
+    """
+    created = Sessions()
+
+    def get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = FakeSession(lambda payload: created.reply(payload))
+            created.append(self._session)
+        return self._session
+
+    monkeypatch.setattr(AsyncWhatsApp, "_get_session", get_session)
+    return created
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Records the backoff sleeps of the async client without actually waiting
+    """
+    recorded = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        if delay:
+            recorded.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(aio.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def test_long_message_chunks_are_sent_in_order(sessions):
+    message = "a" * MAX_TEXT_LENGTH + "b" * MAX_TEXT_LENGTH + "c"
+
+    async def main():
+        async with AsyncWhatsApp("token", "123") as whatsapp:
+            return await whatsapp.send_message(message, "5511999999999")
+
+    responses = asyncio.run(main())
+    assert len(responses) == 3
+    bodies = [payload["text"]["body"] for payload in sessions[0].sent]
+    assert bodies == ["a" * MAX_TEXT_LENGTH, "b" * MAX_TEXT_LENGTH, "c"]
+
+
+def test_broadcast_keeps_recipient_order(sessions):
+    recipients = [str(i) for i in range(20)]
+    # later recipients answer first
+    sessions.reply = lambda payload: (
+        200,
+        {"to": payload["to"]},
+        (20 - int(payload["to"])) * 0.001,
+    )
+
+    async def main():
+        async with AsyncWhatsApp("token", "123", batch_size=4) as whatsapp:
+            return await whatsapp.broadcast_message("hi", recipients)
+
+    responses = asyncio.run(main())
+    assert [response["to"] for response in responses] == recipients
+
+
+def test_rate_limited_send_backs_off_and_retries(sessions, sleeps):
+    replies = iter([(429, {"error": {"code": 130429}}, 0)] * 2 + [(200, {"ok": 1}, 0)])
+    sessions.reply = lambda payload: next(replies)
+
+    async def main():
+        async with AsyncWhatsApp("token", "123") as whatsapp:
+            return await whatsapp.send_message("hi", "5511999999999")
+
+    assert asyncio.run(main()) == {"ok": 1}
+    assert len(sessions[0].sent) == 3
+    assert sleeps == [1, 2]
+
+
+def test_rate_limit_gives_up_after_max_retries(sessions, sleeps, caplog):
+    sessions.reply = lambda payload: (429, {"error": {"code": 130429}}, 0)
+
+    async def main():
+        async with AsyncWhatsApp("token", "123", max_retries=2) as whatsapp:
+            return await whatsapp.send_template("hello", "5511999999999", [])
+
+    with caplog.at_level(logging.INFO):
+        assert asyncio.run(main()) == {"error": {"code": 130429}}
+    assert len(sessions[0].sent) == 3
+    assert "Template not sent to 5511999999999" in caplog.text
+
+
+def test_flush_and_close_before_reuse(sessions):
+    async def main():
+        whatsapp = AsyncWhatsApp("token", "123")
+        pending = asyncio.ensure_future(whatsapp.send_message("first", "1"))
+        await asyncio.sleep(0)
+        await whatsapp.flush()
+        assert pending.done()
+        await whatsapp.close()
+        assert sessions[0].closed
+        response = await whatsapp.send_message("second", "2")
+        await whatsapp.close()
+        return response
+
+    assert asyncio.run(main()) == {"to": "2"}
+    assert len(sessions) == 2
+    assert sessions[1].sent[0]["text"]["body"] == "second"
@@ -0,0 +1,98 @@
+import pytest
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from pygwan import pygwan as pg
+from pygwan.pygwan import WhatsApp, _GraphRetry
+
+
+def graph_retry(**kwargs):
+    return _GraphRetry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        **kwargs
+    )
+
+
+@pytest.mark.parametrize(
+    "method, status, retried",
+    [
+        ("POST", 429, True),
+        ("POST", 500, False),
+        ("POST", 503, False),
+        ("GET", 429, True),
+        ("GET", 503, True),
+        ("GET", 404, False),
+    ],
+)
+def test_only_429_is_retried_for_post(method, status, retried):
+    assert graph_retry().is_retry(method, status) is retried
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ReadTimeoutError(None, "/messages", "Read timed out."),
+        ProtocolError("Connection aborted."),
+    ],
+)
+def test_read_errors_are_not_retried_for_post(error):
+    with pytest.raises(type(error)):
+        graph_retry().increment("POST", "/messages", error=error)
+    retry = graph_retry().increment("GET", "/media", error=error)
+    assert retry.total == 4
+
+
+def test_client_hands_back_the_last_response_once_retries_run_out():
+    whatsapp = WhatsApp("token", "123")
+    for url in (pg.GRAPH_HOST, "https://example.com/media"):
+        retry = whatsapp._session.get_adapter(url).max_retries
+        assert isinstance(retry, _GraphRetry)
+        assert retry.raise_on_status is False
+
+
+@pytest.fixture
+def http2_client(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    sleeps = []
+    monkeypatch.setattr(pg.time, "sleep", sleeps.append)
+
+    def make(handler):
+        whatsapp = WhatsApp("token", "123", use_http2=True)
+        whatsapp._http = httpx.Client(transport=httpx.MockTransport(handler))
+        return whatsapp
+
+    make.sleeps = sleeps
+    return make
+
+
+def test_http2_retries_429(http2_client):
+    import httpx
+
+    statuses = iter([429, 429, 200])
+
+    def handler(request):
+        status = next(statuses)
+        headers = {"Retry-After": "3"} if status == 429 and not http2_client.sleeps else {}
+        return httpx.Response(status, json={"status": status}, headers=headers)
+
+    whatsapp = http2_client(handler)
+    assert whatsapp.send_message("hi", "5511999999999") == {"status": 200}
+    assert http2_client.sleeps == [3.0, 1.0]
+
+
+def test_http2_gives_up_after_five_retries(http2_client):
+    import httpx
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, json={"error": {"code": 130429}})
+
+    whatsapp = http2_client(handler)
+    assert whatsapp.send_message("hi", "5511999999999") == {"error": {"code": 130429}}
+    assert len(calls) == 6
+    assert http2_client.sleeps == [0.5, 1.0, 2.0, 4.0, 8.0]
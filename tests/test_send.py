@@ -0,0 +1,82 @@
+import json
+
+import pytest
+import requests
+import responses
+
+from pygwan.pygwan import WhatsApp, _dumps, _template_body, _template_prefix
+
+COMPONENTS = [{"type": "body", "parameters": [{"type": "text", "text": "Ana"}]}]
+
+
+@pytest.fixture
+def whatsapp():
+    return WhatsApp("token", "123")
+
+
+def test_template_body_bytes():
+    body = _template_body(_template_prefix("welcome", "pt_BR"), COMPONENTS, "5511")
+    assert body == (
+        b'{"messaging_product":"whatsapp","type":"template","template":{"name":'
+        b'"welcome","language":{"code":"pt_BR"},"components":'
+        + _dumps(COMPONENTS)
+        + b'},"to":"5511"}'
+    )
+    assert json.loads(body) == {
+        "messaging_product": "whatsapp",
+        "type": "template",
+        "template": {
+            "name": "welcome",
+            "language": {"code": "pt_BR"},
+            "components": COMPONENTS,
+        },
+        "to": "5511",
+    }
+
+
+def test_template_prefix_escapes_names():
+    body = _template_body(_template_prefix('say "hi"', "en_US"), [], "1")
+    assert json.loads(body)["template"]["name"] == 'say "hi"'
+
+
+@responses.activate
+def test_make_sender_posts_the_same_payload_as_send_template(whatsapp):
+    responses.add(responses.POST, whatsapp.url, json={"messages": [{"id": "m1"}]})
+    send_welcome = whatsapp.make_sender("welcome", "pt_BR")
+    assert send_welcome("5511999999999", COMPONENTS) == {"messages": [{"id": "m1"}]}
+    whatsapp.send_template("welcome", "5511999999999", COMPONENTS, lang="pt_BR")
+    first, second = (call.request for call in responses.calls)
+    assert first.body == second.body
+    assert json.loads(first.body)["to"] == "5511999999999"
+
+
+@responses.activate
+def test_error_response_is_returned(whatsapp):
+    error = {"error": {"code": 131030, "message": "Recipient not allowed"}}
+    responses.add(responses.POST, whatsapp.url, json=error, status=400)
+    assert whatsapp.send_message("hi", "5511999999999") == error
+
+
+@responses.activate
+def test_download_media_moves_the_complete_file_into_place(whatsapp, tmp_path):
+    content = b"\xff\xd8" + b"x" * 200000
+    responses.add(responses.GET, "https://example.com/media", body=content)
+    target = tmp_path / "photo"
+    saved = whatsapp.download_media("https://example.com/media", "image/jpeg", str(target))
+    assert saved == f"{target}.jpeg"
+    assert (tmp_path / "photo.jpeg").read_bytes() == content
+    assert [path.name for path in tmp_path.iterdir()] == ["photo.jpeg"]
+
+
+@responses.activate
+def test_download_media_leaves_no_partial_file(whatsapp, tmp_path, monkeypatch):
+    responses.add(responses.GET, "https://example.com/media", body=b"x" * 200000)
+
+    def broken_stream(self, chunk_size=1):
+        yield b"x" * chunk_size
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    monkeypatch.setattr(requests.Response, "iter_content", broken_stream)
+    target = tmp_path / "photo"
+    assert whatsapp.download_media("https://example.com/media", "image/jpeg", str(target)) is None
+    assert list(tmp_path.iterdir()) == []
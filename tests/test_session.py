@@ -0,0 +1,54 @@
+import weakref
+from unittest import mock
+
+import pytest
+
+from pygwan import pygwan as pg
+from pygwan.pygwan import DEFAULT_TIMEOUT, GRAPH_HOST, SOCKET_OPTIONS, WhatsApp
+
+
+def _sent_timeout(adapter, url):
+    with mock.patch("requests.adapters.HTTPAdapter.send") as send:
+        adapter.send(mock.Mock(url=url, method="POST"))
+    return send.call_args.args[2]
+
+
+def test_graph_adapter_defaults():
+    whatsapp = WhatsApp("token", "123")
+    adapter = whatsapp._session.get_adapter(GRAPH_HOST)
+    assert adapter.poolmanager.connection_pool_kw["socket_options"] == SOCKET_OPTIONS
+    assert _sent_timeout(adapter, GRAPH_HOST) == DEFAULT_TIMEOUT
+
+
+def test_caching_adapter_keeps_keep_alive_and_timeout(tmp_path):
+    pytest.importorskip("cachecontrol")
+    whatsapp = WhatsApp("token", "123", cache_dir=str(tmp_path))
+    adapter = whatsapp._session.get_adapter("https://example.com/media")
+    assert type(adapter).__name__ == "_CachingAdapter"
+    assert adapter.poolmanager.connection_pool_kw["socket_options"] == SOCKET_OPTIONS
+    assert _sent_timeout(adapter, "https://example.com/media") == DEFAULT_TIMEOUT
+
+
+COMPILED = not pg.__file__.endswith(".py")
+
+
+@pytest.mark.skipif(COMPILED, reason="mypyc-compiled WhatsApp instances are fixed")
+def test_instances_can_be_patched_and_weak_referenced():
+    whatsapp = WhatsApp("token", "123")
+    with mock.patch.object(whatsapp, "send_message", return_value={}) as send:
+        whatsapp.send_message("hi", "5511999999999")
+    send.assert_called_once()
+    whatsapp.extra = "attribute"
+    assert weakref.ref(whatsapp)() is whatsapp
+
+
+def test_subclass_instances_can_be_patched():
+    class Client(WhatsApp):
+        pass
+
+    whatsapp = Client("token", "123")
+    with mock.patch.object(whatsapp, "send_message", return_value={}) as send:
+        whatsapp.send_message("hi", "5511999999999")
+    send.assert_called_once()
+    whatsapp.extra = "attribute"
+    assert weakref.ref(whatsapp)() is whatsapp
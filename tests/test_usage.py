@@ -0,0 +1,47 @@
+import json
+import time
+
+import pytest
+import responses
+
+from pygwan.pygwan import MAX_THROTTLE_WAIT, WhatsApp, _graph_usage, _graph_wait
+
+
+def buc_usage(call_count, minutes=0):
+    entry = {"type": "messaging", "call_count": call_count}
+    entry["estimated_time_to_regain_access"] = minutes
+    return {"X-Business-Use-Case-Usage": json.dumps({"123": [entry]})}
+
+
+def test_graph_usage_reads_both_headers():
+    headers = buc_usage(40, minutes=2)
+    headers["X-App-Usage"] = json.dumps({"call_count": 55, "total_time": 12})
+    assert _graph_usage(headers) == (55, 120)
+    assert _graph_usage({"X-App-Usage": "not json"}) == (0, 0)
+
+
+@pytest.mark.parametrize(
+    "headers, wait",
+    [
+        ({}, 0),
+        (buc_usage(95), 0),
+        (buc_usage(100), MAX_THROTTLE_WAIT),
+        (buc_usage(80, minutes=0.5), 30),
+        (buc_usage(100, minutes=30), MAX_THROTTLE_WAIT),
+    ],
+)
+def test_graph_wait(headers, wait):
+    assert _graph_wait(headers) == wait
+
+
+@responses.activate
+def test_sync_client_pauses_after_throttled_response():
+    whatsapp = WhatsApp("token", "123")
+    responses.add(
+        responses.POST,
+        whatsapp.url,
+        json={"messages": [{"id": "m1"}]},
+        headers=buc_usage(100, minutes=0.5),
+    )
+    whatsapp.send_message("hi", "5511999999999")
+    assert 25 < whatsapp._throttled_until - time.monotonic() <= 30
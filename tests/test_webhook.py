@@ -0,0 +1,142 @@
+import json
+
+import pytest
+
+from pygwan import pygwan as pg
+from pygwan.pygwan import WhatsApp
+
+
+def webhook(message=None, contact=None, status=None):
+    value = {"messaging_product": "whatsapp"}
+    if contact is not None:
+        value["contacts"] = [contact]
+    if message is not None:
+        value["messages"] = [message]
+    if status is not None:
+        value["statuses"] = [status]
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{"id": "1", "changes": [{"field": "messages", "value": value}]}],
+    }
+
+
+CONTACT = {"wa_id": "5511999999999", "profile": {"name": "Ana"}}
+
+
+@pytest.fixture
+def whatsapp():
+    return WhatsApp("token", "123")
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        {"id": "m1", "type": "text"},
+        {"id": "m1", "type": "text", "text": {}},
+        {"id": "m1", "type": "interactive", "interactive": {"type": "button_reply"}},
+        {"id": "m1", "type": "interactive", "interactive": {"button_reply": {}}},
+        {"id": "m1", "type": "button"},
+    ],
+)
+def test_partial_message_does_not_break_getters(whatsapp, message):
+    data = webhook(message, CONTACT)
+    assert whatsapp.get_message(data) is None
+    assert whatsapp.get_mobile(data) == "5511999999999"
+    assert whatsapp.get_name(data) == "Ana"
+    assert whatsapp.get_message_id(data) == "m1"
+    assert whatsapp.get_message_type(data) == message["type"]
+
+
+def test_message_text_by_type(whatsapp):
+    text = {"type": "text", "text": {"body": "hi"}}
+    reply = {"type": "interactive", "interactive": {"list_reply": {"title": "Two"}}}
+    button = {"type": "button", "button": {"text": "Yes"}}
+    assert whatsapp.get_message(webhook(text)) == "hi"
+    assert whatsapp.get_message(webhook(reply)) == "Two"
+    assert whatsapp.get_message(webhook(button)) == "Yes"
+
+
+def test_getters_see_changes_to_a_mutated_dict(whatsapp):
+    data = webhook({"id": "m1", "type": "text", "text": {"body": "a"}}, CONTACT)
+    assert whatsapp.get_message(data) == "a"
+    value = data["entry"][0]["changes"][0]["value"]
+    value["messages"][0]["text"]["body"] = "b"
+    value["contacts"][0] = {"wa_id": "5511888888888"}
+    assert whatsapp.get_message(data) == "b"
+    assert whatsapp.get_mobile(data) == "5511888888888"
+    data["entry"][0]["changes"][0]["value"] = {"messages": [{"type": "image"}]}
+    assert whatsapp.get_message_type(data) == "image"
+    assert whatsapp.preprocess(data) is data["entry"][0]["changes"][0]["value"]
+
+
+def test_dict_payloads_are_not_kept_alive(whatsapp):
+    whatsapp.get_message(webhook({"type": "text", "text": {"body": "a"}}))
+    assert whatsapp._preprocessed == (None, None)
+    assert whatsapp._viewed == (None, None)
+
+
+DECODERS = [pg._webhook_value_json]
+if pg.simdjson is not None:
+    DECODERS.append(pg._webhook_value_simdjson)
+
+
+@pytest.fixture(params=DECODERS, ids=lambda decoder: decoder.__name__)
+def decoder(request, monkeypatch):
+    monkeypatch.setattr(pg, "_webhook_value", request.param)
+    return request.param
+
+
+def raw(data):
+    return json.dumps(data).encode()
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, bytes.decode])
+def test_raw_bodies(whatsapp, decoder, wrap):
+    data = webhook({"id": "m1", "type": "text", "text": {"body": "olá"}}, CONTACT)
+    body = wrap(raw(data))
+    assert whatsapp.get_message(body) == "olá"
+    assert whatsapp.get_mobile(body) == "5511999999999"
+    assert whatsapp.is_message(body)
+    assert whatsapp.changed_field(body) == "messages"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"entry": []},
+        {"entry": "x"},
+        {"entry": [{"changes": []}]},
+        {"entry": [{"changes": [{"value": [1]}]}]},
+        {"entry": [{"changes": [{"value": 1}]}]},
+    ],
+)
+def test_malformed_payloads_give_the_empty_mapping(whatsapp, decoder, data):
+    assert whatsapp.preprocess(data) is pg._EMPTY
+    assert whatsapp.preprocess(raw(data)) is pg._EMPTY
+    assert whatsapp.get_message(raw(data)) is None
+    assert not whatsapp.is_message(data)
+
+
+def test_reused_buffer_is_decoded_again(whatsapp, decoder):
+    first = raw(webhook({"type": "text", "text": {"body": "first"}}))
+    second = raw(webhook({"type": "text", "text": {"body": "second"}}))
+    buffer = bytearray(first)
+    assert whatsapp.get_message(buffer) == "first"
+    buffer[:] = second
+    assert whatsapp.get_message(buffer) == "second"
+
+
+def test_batch_extract(whatsapp):
+    np = pytest.importorskip("numpy")
+    datas = [
+        webhook({"id": "m1", "type": "text", "timestamp": "1700000000"}, CONTACT),
+        raw(webhook({"id": "m2", "type": "image"}, {"wa_id": "5511888888888"})),
+        {"entry": []},
+    ]
+    columns = whatsapp.batch_extract(datas)
+    assert list(columns["wa_id"]) == ["5511999999999", "5511888888888", None]
+    assert list(columns["message_id"]) == ["m1", "m2", None]
+    assert list(columns["type"]) == ["text", "image", None]
+    assert columns["timestamp"].dtype == np.int64
+    assert list(columns["timestamp"]) == [1700000000, 0, 0]